@@ -3,18 +3,24 @@ Multilingual Abusive Language Detection API
 Production-ready FastAPI application
 """
 
+import json
 import time
 from typing import List, Optional, Dict, Any
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Request, Response
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, Field, ValidationError
+import orjson
 import structlog
 
 from src.detector import AbuseDetector
-from src.models import DetectionRequest, DetectionResponse
-from src.middleware import RateLimitMiddleware, MetricsMiddleware
+from src.models import (
+    DetectionRequest, DetectionResponse, BatchRequestAdapter, BatchResponseAdapter
+)
+from src.middleware import RateLimitMiddleware, MetricsMiddleware, RequestMetrics
 from src.config import get_settings
 
 logger = structlog.get_logger()
@@ -46,7 +52,8 @@ app = FastAPI(
     title="Multilingual Abusive Language Detection API",
     description="Production-ready API for detecting abusive content across English and Indian languages",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # Middleware
@@ -58,7 +65,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 app.add_middleware(RateLimitMiddleware)
-app.add_middleware(MetricsMiddleware)
+# Shared with the /metrics endpoint; counts are per worker process
+request_metrics = RequestMetrics()
+app.add_middleware(MetricsMiddleware, metrics=request_metrics)
 
 def get_detector() -> AbuseDetector:
     """Dependency to get detector instance"""
@@ -75,7 +84,12 @@ async def health_check():
         "version": "1.0.0"
     }
 
-@app.post("/detect", response_model=DetectionResponse)
+@app.get("/metrics")
+async def get_metrics():
+    """Request counters for this worker"""
+    return request_metrics.snapshot()
+
+@app.post("/detect", response_model=DetectionResponse, response_model_exclude_none=True)
 async def detect_abuse(
     request: DetectionRequest,
     detector: AbuseDetector = Depends(get_detector)
@@ -111,41 +125,114 @@ async def detect_abuse(
         logger.error("Detection failed", error=str(e))
         raise HTTPException(status_code=500, detail="Detection failed")
 
-@app.post("/batch-detect")
+def _batch_validation_error(body: bytes, error: ValidationError) -> RequestValidationError:
+    """Report batch body errors in the same shape as FastAPI's own body validation"""
+    if not body:
+        return RequestValidationError(
+            [{"type": "missing", "loc": ("body",), "msg": "Field required", "input": None}]
+        )
+    
+    errors = error.errors(include_url=False)
+    if errors[0]["type"] == "json_invalid":
+        # FastAPI decodes with the json module and reports its error position
+        try:
+            json.loads(body)
+        except json.JSONDecodeError as e:
+            return RequestValidationError(
+                [{
+                    "type": "json_invalid",
+                    "loc": ("body", e.pos),
+                    "msg": "JSON decode error",
+                    "input": {},
+                    "ctx": {"error": e.msg}
+                }],
+                body=e.doc
+            )
+    
+    return RequestValidationError(
+        [{**err, "loc": ("body", *err["loc"])} for err in errors]
+    )
+
+@app.post(
+    "/batch-detect",
+    response_model=List[DetectionResponse],
+    response_model_exclude_none=True,
+    # The body is read raw, so describe it for the OpenAPI schema by hand
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {
+                    "schema": {
+                        "type": "array",
+                        "items": {"$ref": "#/components/schemas/DetectionRequest"}
+                    }
+                }
+            }
+        }
+    }
+)
 async def batch_detect(
-    requests: List[DetectionRequest],
+    http_request: Request,
     detector: AbuseDetector = Depends(get_detector)
-) -> List[DetectionResponse]:
+) -> Response:
     """Batch detection endpoint for multiple texts"""
+    # Validate the raw body in one pass instead of per item
+    body = await http_request.body()
+    try:
+        requests = BatchRequestAdapter.validate_json(body)
+    except ValidationError as e:
+        raise _batch_validation_error(body, e)
+    
     if len(requests) > 100:
         raise HTTPException(status_code=400, detail="Batch size too large (max 100)")
     
-    results = []
-    for req in requests:
-        result = await detector.detect(req)
-        results.append(result)
-    
-    return results
+    results = await detector.detect_batch(requests)
+    return Response(
+        BatchResponseAdapter.dump_json(results, exclude_none=True),
+        media_type="application/json"
+    )
+
+# Static payload, serialized once at import json
+import time
+LANGUAGES_JSON = orjson.dumps({
+    "supported_languages": [
+        {"code": "en", "name": "English"},
+        {"code": "hi", "name": "Hindi"},
+        {"code": "bn", "name": "Bengali"},
+        {"code": "ta", "name": "Tamil"},
+        {"code": "te", "name": "Telugu"},
+        {"code": "kn", "name": "Kannada"},
+        {"code": "ml", "name": "Malayalam"},
+        {"code": "gu", "name": "Gujarati"},
+        {"code": "pa", "name": "Punjabi"},
+        {"code": "or", "name": "Odia"},
+        {"code": "ur", "name": "Urdu"}
+    ]
+})
 
 @app.get("/languages")
 async def get_supported_languages():
     """Get list of supported languages"""
-    return {
-        "supported_languages": [
-            {"code": "en", "name": "English"},
-            {"code": "hi", "name": "Hindi"},
-            {"code": "bn", "name": "Bengali"},
-            {"code": "ta", "name": "Tamil"},
-            {"code": "te", "name": "Telugu"},
-            {"code": "kn", "name": "Kannada"},
-            {"code": "ml", "name": "Malayalam"},
-            {"code": "gu", "name": "Gujarati"},
-            {"code": "pa", "name": "Punjabi"},
-            {"code": "or", "name": "Odia"},
-            {"code": "ur", "name": "Urdu"}
-        ]
-    }
+    return Response(LANGUAGES_JSON, media_type="application/json")
 
 if __name__ == "__main__":
+    import os
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    
+    settings = get_settings()
+    # One worker unless asked for more: each worker loads its own models, and
+    # rate limits and caches are kept per worker
+    workers = int(os.environ.get("WEB_CONCURRENCY", "1"))
+    # Workers read this to split CPU threads between them
+    os.environ["WEB_CONCURRENCY"] = str(workers)
+    
+    uvicorn.run(
+        "app:app",
+        host=settings.api_host,
+        port=settings.api_port,
+        loop="auto",
+        http="auto",
+        workers=workers,
+        access_log=settings.debug
+    )
\ No newline at end of file
@@ -19,7 +19,7 @@ def run_demo():
         print("✅ FastAPI and Uvicorn are available")
     except ImportError as e:
         print(f"❌ Missing required packages: {e}")
-        print("Please run: pip install fastapi uvicorn pydantic-settings langdetect structlog")
+        print("Please run: pip install fastapi 'uvicorn[standard]' pydantic-settings lingua-language-detector structlog")
         return
     
     # Start the API server
@@ -38,7 +38,7 @@ def run_demo():
         print("\n⏹️  Press Ctrl+C to stop the server")
         
         # Run the server
-        uvicorn.run(app, host="0.0.0.0", port=8000, log_level="info")
+        uvicorn.run(app, host="0.0.0.0", port=8000, log_level="info", loop="auto", http="auto")
         
     except KeyboardInterrupt:
         print("\n\n🛑 Server stopped by user")
@@ -3,8 +3,9 @@ Configuration management
 """
 
 import os
-from typing import Dict, List
-from pydantic_settings import BaseSettings
+from functools import lru_cache
+from typing import Dict, List, Literal
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
     """Application settings"""
@@ -18,6 +19,10 @@ class Settings(BaseSettings):
     model_name: str = "unitary/toxic-bert"
     model_cache_dir: str = "./models"
     device: str = "cpu"  # or "cuda" if available
+    optimize_model: bool = True  # torch.compile on CUDA, IPEX/TorchScript on CPU
+    quantization: Literal["int8", "bf16", "fp32"] = "fp32"
+    max_batch_size: int = 32  # texts per forward pass
+    max_wait_ms: float = 5.0  # time a queued request waits for others to batch with
     
     # Detection Thresholds
     default_threshold: float = 0.5
@@ -28,6 +33,7 @@ class Settings(BaseSettings):
     supported_languages: List[str] = [
         "en", "hi", "bn", "ta", "te", "kn", "ml", "gu", "pa", "or", "ur"
     ]
+    language_cache_size: int = 8192  # entries per worker, 0 disables
     
     # Rate Limiting
     rate_limit_requests: int = 100
@@ -37,16 +43,23 @@ class Settings(BaseSettings):
     redis_url: str = "redis://localhost:6379"
     redis_enabled: bool = False
     
+    # Prediction Cache
+    ml_cache_size: int = 10000  # entries per worker, 0 disables
+    ml_cache_ttl: int = 3600  # seconds, Redis entries only
+    
     # Lexicon Configuration
     lexicon_dir: str = "./lexicons"
     
     # Logging
     log_level: str = "INFO"
     
-    class Config:
-        env_file = ".env"
-        env_prefix = "ABUSE_API_"
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        env_prefix="ABUSE_API_",
+        frozen=True
+    )
 
+@lru_cache(maxsize=1)
 def get_settings() -> Settings:
-    """Get application settings"""
+    """Get application settings, validated once per process"""
     return Settings()
\ No newline at end of file
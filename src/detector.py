@@ -3,26 +3,90 @@ Main abuse detection engine with ensemble approach
 """
 
 import asyncio
+import contextlib
+import os
 import re
-from typing import List, Dict, Tuple, Optional
+import string
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import List, Dict, NamedTuple, Tuple, Optional
+import msgpack
 import structlog
+import xxhash
 
 from .models import DetectionRequest, DetectionResponse, DecisionType, LabelType, Highlight
+from .cache import LRUCache
 from .language_detector import LanguageDetector
 from .config import Settings
 
+try:
+    import torch
+    _HAS_TORCH = True
+except ImportError:
+    torch = None
+    _HAS_TORCH = False
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
 logger = structlog.get_logger()
 
+# Characters that may delimit a lexicon match: ASCII whitespace and punctuation
+# via a lookup table, other characters by Unicode category
+_ASCII_BOUNDARY = bytes(
+    1 if chr(code) in string.whitespace + string.punctuation else 0
+    for code in range(128)
+)
+
+
+@lru_cache(maxsize=4096)
+def _is_unicode_boundary(ch: str) -> bool:
+    return unicodedata.category(ch)[0] in ('Z', 'P')
+
+
+def _is_boundary_char(ch: str) -> bool:
+    code = ord(ch)
+    if code < 128:
+        return _ASCII_BOUNDARY[code] == 1
+    return _is_unicode_boundary(ch)
+
+
+class _RawHighlight(NamedTuple):
+    """Lexicon hit, converted to a Highlight only when it reaches the response"""
+    start: int
+    end: int
+    severity: float
+    type: LabelType
+    matched_term: str
+
+
+# Stand-in ML result when the lexicon alone decides a request. Confidence 1.0
+# means "not consulted": the response confidence is the minimum over
+# detectors, so it then reports the lexicon's confidence unchanged.
+SKIPPED_ML_RESULT = {
+    "severity": 0.0,
+    "confidence": 1.0,
+    "labels": [],
+    "highlights": []
+}
+
+
 class AbuseDetector:
     """Main ensemble detector combining ML, lexicon, and context analysis"""
     
     def __init__(self, settings: Settings):
         self.settings = settings
-        self.language_detector = LanguageDetector()
+        self.language_detector = LanguageDetector(settings.language_cache_size, settings.supported_languages)
         self.text_normalizer = TextNormalizer()
         self.ml_classifier = MLClassifier(settings)
         self.lexicon_detector = LexiconDetector(settings)
         self.context_analyzer = ContextAnalyzer()
+        # Read on every request; Settings is frozen so plain attributes are safe
+        self.block_threshold = settings.block_threshold
+        self.default_threshold = settings.default_threshold
         
     async def initialize(self):
         """Initialize all components"""
@@ -59,12 +123,107 @@ class AbuseDetector:
         else:
             detected_languages = await self.language_detector.detect(normalized_text)
         
-        # Step 3: Run ensemble detection
-        ml_result = await self.ml_classifier.predict(normalized_text, detected_languages)
-        lexicon_result = await self.lexicon_detector.detect(normalized_text, detected_languages)
+        # Step 3: Lexicon first, a single linear scan that can make the ML pass unnecessary
+        lexicon_result = self.lexicon_detector.detect(normalized_text, detected_languages)
+        
+        # Step 4: Run the ML classifier unless the lexicon already decided
+        if self._needs_ml(normalized_text, detected_languages, lexicon_result):
+            ml_result = await self.ml_classifier.predict(normalized_text, detected_languages)
+        else:
+            ml_result = SKIPPED_ML_RESULT
+        
+        # Step 5: Context analysis and combination; short GIL-bound work, so
+        # it runs inline rather than paying for a thread hop
+        return self._detect_cpu(request, normalized_text, detected_languages, ml_result, lexicon_result)
+    
+    async def detect_batch(self, requests: List[DetectionRequest]) -> List[DetectionResponse]:
+        """
+        Detect abuse in several requests, sharing ML forward passes
+        
+        Args:
+            requests: Detection requests
+            
+        Returns:
+            DetectionResponse for each request, in input order
+        """
+        normalized_texts = [self.text_normalizer.normalize(req.text) for req in requests]
+        
+        # Detect languages for every request that did not supply them in one pass
+        languages_list = [req.languages for req in requests]
+        pending = [i for i, languages in enumerate(languages_list) if not languages]
+        if pending:
+            detected = await self.language_detector.detect_batch([normalized_texts[i] for i in pending])
+            for i, languages in zip(pending, detected):
+                languages_list[i] = languages
+        
+        lexicon_results = [
+            self.lexicon_detector.detect(normalized_text, languages)
+            for normalized_text, languages in zip(normalized_texts, languages_list)
+        ]
+        
+        # Group texts that still need the ML pass by language set and sort each
+        # group by length so that similarly sized texts are padded together
+        ml_results: List[Dict] = [SKIPPED_ML_RESULT] * len(requests)
+        groups: Dict[Tuple[str, ...], List[int]] = {}
+        for i, languages in enumerate(languages_list):
+            if self._needs_ml(normalized_texts[i], languages, lexicon_results[i]):
+                groups.setdefault(tuple(languages), []).append(i)
+        
+        for indices in groups.values():
+            indices.sort(key=lambda i: len(normalized_texts[i]))
+            predictions = await self.ml_classifier.predict_batch(
+                [normalized_texts[i] for i in indices],
+                [languages_list[i] for i in indices]
+            )
+            for i, prediction in zip(indices, predictions):
+                ml_results[i] = prediction
+        
+        return self._detect_cpu_batch(requests, normalized_texts, languages_list, ml_results, lexicon_results)
+    
+    def _needs_ml(self, normalized_text: str, languages: List[str], lexicon_result: Dict) -> bool:
+        """Whether the ML classifier could still change the lexicon's verdict"""
+        # A lexicon hit at block severity already decides the outcome
+        if lexicon_result["severity"] >= self.block_threshold:
+            return False
+        
+        # Texts under three tokens without lexicon hits are allowed outright,
+        # but only when a lexicon actually covered one of their languages;
+        # normalized text has single spaces, so spaces count token gaps
+        if (
+            not lexicon_result["highlights"]
+            and normalized_text.count(" ") < 2
+            and any(lang in self.lexicon_detector.automata for lang in languages)
+        ):
+            return False
+        
+        return True
+    
+    def _detect_cpu_batch(
+        self,
+        requests: List[DetectionRequest],
+        normalized_texts: List[str],
+        languages_list: List[List[str]],
+        ml_results: List[Dict],
+        lexicon_results: List[Dict]
+    ) -> List[DetectionResponse]:
+        """Synchronous context and combination steps for a batch"""
+        return [
+            self._detect_cpu(req, normalized_text, languages, ml_result, lexicon_result)
+            for req, normalized_text, languages, ml_result, lexicon_result
+            in zip(requests, normalized_texts, languages_list, ml_results, lexicon_results)
+        ]
+    
+    def _detect_cpu(
+        self,
+        request: DetectionRequest,
+        normalized_text: str,
+        detected_languages: List[str],
+        ml_result: Dict,
+        lexicon_result: Dict
+    ) -> DetectionResponse:
+        """Run context analysis and combine it with the ML and lexicon results"""
         context_result = self.context_analyzer.analyze(normalized_text, ml_result, lexicon_result)
         
-        # Step 4: Combine results
         final_result = self._combine_results(
             request, normalized_text, detected_languages,
             ml_result, lexicon_result, context_result
@@ -98,23 +257,26 @@ class AbuseDetector:
         severity_score = context_result.get("adjusted_severity", severity_score)
         
         # Determine decision
-        decision = self._make_decision(severity_score, request.threshold or self.settings.default_threshold)
+        decision = self._make_decision(severity_score, request.threshold or self.default_threshold)
         
-        # Combine labels
-        labels = list(set(
+        # Combine labels, deduplicated in first-seen order
+        labels = tuple(dict.fromkeys(
             ml_result.get("labels", []) +
             lexicon_result.get("labels", []) +
             context_result.get("labels", [])
         ))
         
         if not labels or severity_score < 0.1:
-            labels = [LabelType.CLEAN]
+            labels = (LabelType.CLEAN,)
         
-        # Combine highlights
-        highlights = []
+        # Combine highlights; detector output is trusted, so skip validation
         if request.include_highlights:
-            highlights.extend(lexicon_result.get("highlights", []))
-            highlights.extend(ml_result.get("highlights", []))
+            highlights = [
+                Highlight.model_construct(**raw._asdict())
+                for raw in lexicon_result.get("highlights", []) + ml_result.get("highlights", [])
+            ]
+        else:
+            highlights = []
         
         # Calculate confidence
         confidence = min(
@@ -123,7 +285,7 @@ class AbuseDetector:
         )
         
         return DetectionResponse(
-            severity_score=min(1.0, max(0.0, severity_score)),
+            severity_score=0.0 if severity_score < 0.0 else 1.0 if severity_score > 1.0 else severity_score,
             decision=decision,
             detected_languages=languages,
             labels=labels,
@@ -133,7 +295,7 @@ class AbuseDetector:
     
     def _make_decision(self, severity: float, threshold: float) -> DecisionType:
         """Make final decision based on severity and thresholds"""
-        if severity >= self.settings.block_threshold:
+        if severity >= self.block_threshold:
             return DecisionType.BLOCK
         elif severity >= threshold:
             return DecisionType.FLAG
@@ -148,12 +310,45 @@ class MLClassifier:
         self.settings = settings
         self.model = None
         self.tokenizer = None
+        self._redis = None
+        self._host_buffers = {}
+        self._device_buffers = {}
+        # Forward passes are serialized on one thread; torch releases the GIL inside kernels
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ml-inference")
+        # Cached predictions are only valid for the model and precision that produced them
+        self._cache = LRUCache(settings.ml_cache_size)
+        self._cache_seed = xxhash.xxh64_intdigest(f"{settings.model_name}:{settings.quantization}".encode("utf-8"))
+        # Concurrent predict() calls are queued and run as one batch
+        self._queue: Optional[asyncio.Queue] = None
+        self._batch_task: Optional[asyncio.Task] = None
     
     async def initialize(self):
         """Initialize ML model"""
+        # Download and load in a worker thread so other components initialize meanwhile
+        await asyncio.to_thread(self._load_model)
+        
+        if self.settings.redis_enabled:
+            try:
+                import redis.asyncio as aioredis
+                
+                self._redis = aioredis.from_url(self.settings.redis_url)
+                logger.info("Redis prediction cache enabled", url=self.settings.redis_url)
+            except Exception as e:
+                logger.error("Failed to connect prediction cache to Redis", error=str(e))
+                self._redis = None
+        
+        if self.model is not None:
+            self._queue = asyncio.Queue()
+            self._batch_task = asyncio.create_task(self._batch_worker())
+    
+    def _load_model(self):
+        """Load, quantize and optimize the model"""
+        if not _HAS_TORCH:
+            logger.error("Failed to load ML model", error="torch is not installed")
+            return
+        
         try:
             from transformers import AutoTokenizer, AutoModelForSequenceClassification
-            import torch
             
             logger.info("Loading ML toxicity model", model=self.settings.model_name)
             
@@ -162,6 +357,16 @@ class MLClassifier:
             
             if torch.cuda.is_available() and self.settings.device == "cuda":
                 self.model = self.model.cuda()
+                self._allocate_buffers()
+            else:
+                # Split cores between server workers instead of oversubscribing them
+                workers = int(os.environ.get("WEB_CONCURRENCY", "1"))
+                torch.set_num_threads(max(1, (os.cpu_count() or 1) // workers))
+            
+            self.model.eval()
+            self._quantize_model()
+            if self.settings.optimize_model:
+                self._optimize_model()
             
             logger.info("ML model loaded successfully")
             
@@ -171,66 +376,319 @@ class MLClassifier:
             self.model = None
             self.tokenizer = None
     
+    def _quantize_model(self):
+        """Convert model weights to the configured precision"""
+        if self.settings.quantization == "int8":
+            if torch.cuda.is_available() and self.settings.device == "cuda":
+                logger.warning("int8 dynamic quantization is CPU-only, keeping fp32 weights")
+                return
+            self.model = torch.quantization.quantize_dynamic(
+                self.model, {torch.nn.Linear}, dtype=torch.qint8
+            )
+        elif self.settings.quantization == "bf16":
+            self.model = self.model.to(torch.bfloat16)
+        
+        logger.info("ML model precision set", quantization=self.settings.quantization)
+    
+    def _autocast(self):
+        """Autocast context matching the configured precision"""
+        if self.settings.quantization != "bf16":
+            return contextlib.nullcontext()
+        device_type = "cuda" if torch.cuda.is_available() and self.settings.device == "cuda" else "cpu"
+        return torch.autocast(device_type=device_type, dtype=torch.bfloat16)
+    
+    def _optimize_model(self):
+        """Compile the model graph: torch.compile on CUDA, IPEX + TorchScript on CPU"""
+        eager_model = self.model
+        example = self.tokenizer(
+            ["warmup"],
+            return_tensors="pt",
+            truncation=True,
+            max_length=512,
+            padding="max_length"
+        )
+        
+        try:
+            if torch.cuda.is_available() and self.settings.device == "cuda":
+                example = {k: v.cuda() for k, v in example.items()}
+                self.model = torch.compile(self.model, mode="reduce-overhead", fullgraph=False)
+                backend = "torch.compile"
+            else:
+                try:
+                    import intel_extension_for_pytorch as ipex
+                except ImportError:
+                    ipex = None
+                
+                # IPEX cannot re-optimize dynamically quantized modules
+                use_ipex = ipex is not None and self.settings.quantization != "int8"
+                if use_ipex:
+                    dtype = torch.bfloat16 if self.settings.quantization == "bf16" else torch.float32
+                    self.model = ipex.optimize(self.model, dtype=dtype)
+                
+                with self._autocast(), torch.no_grad():
+                    traced = torch.jit.trace(self.model, example_kwarg_inputs=dict(example), strict=False)
+                self.model = torch.jit.freeze(traced)
+                backend = "ipex+torchscript" if use_ipex else "torchscript"
+            
+            # Pay compilation and profiling cost before the first request
+            with torch.inference_mode(), self._autocast():
+                for _ in range(2):
+                    self.model(**example)
+            
+            logger.info("ML model optimized", backend=backend)
+            
+        except Exception as e:
+            logger.warning("Model optimization failed, using eager model", error=str(e))
+            self.model = eager_model
+    
     async def cleanup(self):
         """Cleanup model resources"""
+        if self._batch_task is not None:
+            self._batch_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._batch_task
+            self._batch_task = None
+            self._queue = None
+        
         self.model = None
         self.tokenizer = None
+        self._host_buffers = {}
+        self._device_buffers = {}
+        self._cache.clear()
+        self._executor.shutdown(wait=False)
+        if self._redis is not None:
+            await self._redis.close()
+            self._redis = None
     
     async def predict(self, text: str, languages: List[str]) -> Dict:
-        """Predict toxicity using ML model"""
+        """Predict toxicity using ML model, batching with concurrent callers"""
         if not self.model or not self.tokenizer:
-            # Fallback prediction
-            return {
-                "severity": 0.1,
-                "confidence": 0.3,
-                "labels": [],
-                "highlights": []
-            }
+            return self._fallback_result()
         
-        try:
-            import torch
+        cached = self._cache.get(self._cache_key(text))
+        if cached is not None:
+            return cached
+        
+        if self._queue is None:
+            results = await self.predict_batch([text], [languages])
+            return results[0]
+        
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((text, languages, future))
+        return await future
+    
+    async def _batch_worker(self):
+        """Drain queued predict() calls into batches of up to max_batch_size"""
+        max_wait = self.settings.max_wait_ms / 1000
+        
+        while True:
+            batch = [await self._queue.get()]
             
-            # Tokenize input
-            inputs = self.tokenizer(
-                text,
-                return_tensors="pt",
-                truncation=True,
-                max_length=512,
-                padding=True
-            )
+            # Give concurrent requests a short window to join the batch
+            if max_wait > 0 and self._queue.empty():
+                await asyncio.sleep(max_wait)
             
-            if torch.cuda.is_available() and self.settings.device == "cuda":
-                inputs = {k: v.cuda() for k, v in inputs.items()}
+            while len(batch) < self.settings.max_batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
             
-            # Get prediction
-            with torch.no_grad():
-                outputs = self.model(**inputs)
-                probabilities = torch.softmax(outputs.logits, dim=-1)
-                
-            # Extract toxicity score (assuming binary classification)
-            toxicity_score = probabilities[0][1].item()  # Toxic class probability
+            texts = [text for text, _, _ in batch]
+            languages_list = [languages for _, languages, _ in batch]
             
-            labels = []
-            if toxicity_score > 0.7:
-                labels.append(LabelType.HATE_SPEECH)
-            elif toxicity_score > 0.5:
-                labels.append(LabelType.HARASSMENT)
-            
-            return {
-                "severity": toxicity_score,
-                "confidence": max(probabilities[0]).item(),
-                "labels": labels,
-                "highlights": []  # Would need attention weights for highlights
-            }
+            try:
+                results = await self.predict_batch(texts, languages_list)
+            except Exception as e:
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
             
+            for (_, _, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+    
+    async def predict_batch(self, texts: List[str], languages_list: List[List[str]]) -> List[Dict]:
+        """Predict toxicity for several texts, running one forward pass for uncached texts"""
+        if not self.model or not self.tokenizer:
+            return [self._fallback_result() for _ in texts]
+        
+        keys = [self._cache_key(text) for text in texts]
+        results: List[Optional[Dict]] = [self._cache.get(key) for key in keys]
+        missing = [i for i, result in enumerate(results) if result is None]
+        
+        if missing and self._redis is not None:
+            missing = await self._fill_from_redis(keys, results, missing)
+        
+        if not missing:
+            return results
+        
+        try:
+            loop = asyncio.get_running_loop()
+            predictions = await loop.run_in_executor(
+                self._executor, self._forward, [texts[i] for i in missing]
+            )
         except Exception as e:
-            logger.error("ML prediction failed", error=str(e))
-            return {
-                "severity": 0.1,
-                "confidence": 0.3,
-                "labels": [],
+            logger.error("ML prediction failed", error=str(e), batch_size=len(missing))
+            return [result or self._fallback_result() for result in results]
+        
+        for i, prediction in zip(missing, predictions):
+            results[i] = prediction
+            self._cache.put(keys[i], prediction)
+        
+        if self._redis is not None:
+            await self._store_in_redis([keys[i] for i in missing], predictions)
+        
+        return results
+    
+    def _forward(self, texts: List[str]) -> List[Dict]:
+        """Run the model on texts, at most max_batch_size per forward pass"""
+        batch_size = self.settings.max_batch_size
+        results = []
+        for start in range(0, len(texts), batch_size):
+            results.extend(self._forward_batch(texts[start:start + batch_size]))
+        return results
+    
+    def _forward_batch(self, texts: List[str]) -> List[Dict]:
+        """Run the model on a batch of texts"""
+        # Tokenize the whole batch, padding to the longest text
+        inputs = self.tokenizer(
+            texts,
+            return_tensors="pt",
+            truncation=True,
+            max_length=512,
+            padding=True
+        )
+        
+        if self._device_buffers:
+            inputs = self._stage_inputs(inputs)
+        
+        # Get predictions
+        with torch.inference_mode(), self._autocast():
+            outputs = self.model(**inputs)
+            probabilities = torch.softmax(outputs["logits"].float(), dim=-1)
+        
+        return [self._build_result(row) for row in probabilities.tolist()]
+    
+    def _allocate_buffers(self):
+        """Preallocate pinned host and device buffers for token tensors"""
+        size = self.settings.max_batch_size * 512
+        keys = self.tokenizer("warmup", return_tensors="pt").keys()
+        self._host_buffers = {
+            key: torch.zeros(size, dtype=torch.long, pin_memory=True) for key in keys
+        }
+        self._device_buffers = {
+            key: torch.zeros(size, dtype=torch.long, device="cuda") for key in keys
+        }
+    
+    def _stage_inputs(self, inputs) -> Dict:
+        """Copy token tensors to the GPU through the preallocated buffers"""
+        staged = {}
+        for key, tensor in inputs.items():
+            rows, cols = tensor.shape
+            # Contiguous views over the front of the flat buffers
+            host = self._host_buffers[key][:rows * cols].view(rows, cols)
+            device = self._device_buffers[key][:rows * cols].view(rows, cols)
+            host.copy_(tensor)
+            device.copy_(host, non_blocking=True)
+            staged[key] = device
+        return staged
+    
+    def _cache_key(self, text: str) -> int:
+        """Hash of the normalized text, scoped to the loaded model"""
+        return xxhash.xxh64_intdigest(text.encode("utf-8"), seed=self._cache_seed)
+    
+    async def _fill_from_redis(self, keys: List[int], results: List[Optional[Dict]], missing: List[int]) -> List[int]:
+        """Fill cache misses from Redis and return the indices still missing"""
+        try:
+            values = await self._redis.mget([f"ml:{keys[i]}" for i in missing])
+        except Exception as e:
+            logger.warning("Redis cache lookup failed", error=str(e))
+            return missing
+        
+        still_missing = []
+        for i, value in zip(missing, values):
+            if value is None:
+                still_missing.append(i)
+                continue
+            severity, confidence, labels = msgpack.unpackb(value)
+            results[i] = {
+                "severity": severity,
+                "confidence": confidence,
+                "labels": [LabelType(label) for label in labels],
                 "highlights": []
             }
+            self._cache.put(keys[i], results[i])
+        
+        return still_missing
+    
+    async def _store_in_redis(self, keys: List[int], predictions: List[Dict]):
+        """Share fresh predictions with other workers"""
+        try:
+            async with self._redis.pipeline(transaction=False) as pipe:
+                for key, prediction in zip(keys, predictions):
+                    value = msgpack.packb((
+                        prediction["severity"],
+                        prediction["confidence"],
+                        [label.value for label in prediction["labels"]]
+                    ))
+                    pipe.set(f"ml:{key}", value, ex=self.settings.ml_cache_ttl)
+                await pipe.execute()
+        except Exception as e:
+            logger.warning("Redis cache store failed", error=str(e))
+    
+    def _build_result(self, probabilities: List[float]) -> Dict:
+        """Turn class probabilities for one text into a detection result"""
+        # Extract toxicity score (assuming binary classification)
+        toxicity_score = probabilities[1]  # Toxic class probability
+        
+        labels = []
+        if toxicity_score > 0.7:
+            labels.append(LabelType.HATE_SPEECH)
+        elif toxicity_score > 0.5:
+            labels.append(LabelType.HARASSMENT)
+        
+        return {
+            "severity": toxicity_score,
+            "confidence": max(probabilities),
+            "labels": labels,
+            "highlights": []  # Would need attention weights for highlights
+        }
+    
+    def _fallback_result(self) -> Dict:
+        """Prediction used when the model is unavailable or fails"""
+        return {
+            "severity": 0.1,
+            "confidence": 0.3,
+            "labels": [],
+            "highlights": []
+        }
+
+
+class _RegexMatcher:
+    """Fallback with the ahocorasick.Automaton interface when pyahocorasick is unavailable"""
+    
+    def __init__(self):
+        self._words = {}
+        self._pattern = None
+    
+    def add_word(self, key: str, value: Tuple) -> None:
+        self._words[key] = value
+    
+    def make_automaton(self) -> None:
+        # One alternation for the whole lexicon, longest words first
+        alternation = '|'.join(map(re.escape, sorted(self._words, key=len, reverse=True)))
+        
+        # A hit starting inside another hit is preceded by a word character and
+        # fails the boundary check anyway, unless some word contains a delimiter;
+        # only then report every start position via a lookahead, like the automaton
+        if any(_is_boundary_char(ch) for word in self._words for ch in word):
+            self._pattern = re.compile(f'(?=({alternation}))')
+        else:
+            self._pattern = re.compile(f'({alternation})')
+    
+    def iter(self, text: str):
+        for match in self._pattern.finditer(text):
+            key = match.group(1)
+            yield match.start(1) + len(key) - 1, self._words[key]
 
 
 class LexiconDetector:
@@ -239,11 +697,27 @@ class LexiconDetector:
     def __init__(self, settings: Settings):
         self.settings = settings
         self.lexicons = {}
+        self.automata = {}
+        self.cased_languages = set()
+        self.cat_severity = {
+            'profanity': 0.6,
+            'hate_speech': 0.9,
+            'harassment': 0.7,
+            'threat': 0.95,
+            'sexual_content': 0.8
+        }
         
     async def initialize(self):
         """Initialize lexicons for all supported languages"""
         logger.info("Initializing lexicon detector")
         
+        # Built in a worker thread so it overlaps the ML model download
+        await asyncio.to_thread(self._build_automata)
+        
+        logger.info("Lexicon detector initialized")
+    
+    def _build_automata(self):
+        """Load lexicons and build one matcher per language"""
         # Sample lexicons - in production, load from files
         self.lexicons = {
             'en': {
@@ -264,47 +738,60 @@ class LexiconDetector:
             # Add more languages as needed
         }
         
-        logger.info("Lexicon detector initialized")
+        # One automaton per language so detection is a single pass over the text
+        self.automata = {}
+        self.cased_languages = set()
+        for lang, categories in self.lexicons.items():
+            automaton = ahocorasick.Automaton() if ahocorasick else _RegexMatcher()
+            for category, words in categories.items():
+                for word in words:
+                    word_lower = word.lower()
+                    automaton.add_word(word_lower, (category, word, len(word_lower)))
+                    # Only lexicons with cased letters need the text lowercased
+                    if word_lower != word.upper():
+                        self.cased_languages.add(lang)
+            automaton.make_automaton()
+            self.automata[lang] = automaton
+        
+        if ahocorasick is None:
+            logger.warning("pyahocorasick not installed, using regex lexicon matching")
     
-    async def detect(self, text: str, languages: List[str]) -> Dict:
+    def detect(self, text: str, languages: List[str]) -> Dict:
         """Detect abuse using lexicon matching"""
         highlights = []
-        labels = set()
+        # Dict as an ordered set so labels come out in first-match order
+        labels: Dict[LabelType, None] = {}
         max_severity = 0.0
         
-        text_lower = text.lower()
+        text_lower = None
         
         for lang in languages:
-            if lang not in self.lexicons:
+            automaton = self.automata.get(lang)
+            if automaton is None:
                 continue
+            
+            # Caseless scripts (Devanagari, Bengali, ...) are matched against the text as is
+            if lang in self.cased_languages:
+                if text_lower is None:
+                    text_lower = text if text.islower() else text.lower()
+                haystack = text_lower
+            else:
+                haystack = text
+            
+            for end_idx, (category, word, length) in automaton.iter(haystack):
+                start = end_idx - length + 1
                 
-            for category, words in self.lexicons[lang].items():
-                for word in words:
-                    word_lower = word.lower()
-                    
-                    # Find all occurrences
-                    start = 0
-                    while True:
-                        pos = text_lower.find(word_lower, start)
-                        if pos == -1:
-                            break
-                        
-                        # Check word boundaries for better matching
-                        if self._is_word_boundary(text_lower, pos, len(word_lower)):
-                            severity = self._get_severity_for_category(category)
-                            max_severity = max(max_severity, severity)
-                            
-                            highlights.append(Highlight(
-                                start=pos,
-                                end=pos + len(word),
-                                severity=severity,
-                                type=LabelType(category),
-                                matched_term=word
-                            ))
-                            
-                            labels.add(LabelType(category))
-                        
-                        start = pos + 1
+                # Check word boundaries for better matching
+                if not self._is_word_boundary(haystack, start, length):
+                    continue
+                
+                severity = self.cat_severity.get(category, 0.5)
+                max_severity = max(max_severity, severity)
+                
+                label = LabelType(category)
+                highlights.append(_RawHighlight(start, start + length, severity, label, word))
+                
+                labels[label] = None
         
         return {
             "severity": max_severity,
@@ -315,51 +802,51 @@ class LexiconDetector:
     
     def _is_word_boundary(self, text: str, pos: int, length: int) -> bool:
         """Check if the match is at word boundaries"""
-        import string
-        
         # Check character before
-        if pos > 0 and text[pos - 1] not in string.whitespace + string.punctuation:
+        if pos > 0 and not _is_boundary_char(text[pos - 1]):
             return False
         
         # Check character after
-        if pos + length < len(text) and text[pos + length] not in string.whitespace + string.punctuation:
+        if pos + length < len(text) and not _is_boundary_char(text[pos + length]):
             return False
         
         return True
-    
-    def _get_severity_for_category(self, category: str) -> float:
-        """Get severity score for lexicon category"""
-        severity_map = {
-            'profanity': 0.6,
-            'hate_speech': 0.9,
-            'harassment': 0.7,
-            'threat': 0.95,
-            'sexual_content': 0.8
-        }
-        return severity_map.get(category, 0.5)
 
 
 class ContextAnalyzer:
     """Analyzes context to adjust detection results"""
     
     def __init__(self):
-        # Negation patterns
-        self.negation_patterns = [
-            re.compile(r'\b(not|no|never|don\'t|doesn\'t|won\'t|can\'t)\s+', re.IGNORECASE),
-            re.compile(r'\b(नहीं|ना|मत)\s+', re.IGNORECASE),  # Hindi negation
-        ]
+        # Each pattern group is fused into one alternation so a check is a single scan
+        # Negation patterns (English and Hindi)
+        self.negation_re = re.compile(
+            r'\b(not|no|never|don\'t|doesn\'t|won\'t|can\'t|नहीं|ना|मत)\s+',
+            re.IGNORECASE
+        )
         
-        # Quote patterns
-        self.quote_patterns = [
-            re.compile(r'["\']([^"\']*)["\']'),
-            re.compile(r'[\u201c\u201d]([^\u201c\u201d]*)[\u201c\u201d]'),  # Smart quotes
-        ]
+        # Quote patterns (straight and smart quotes)
+        self.quote_re = re.compile(
+            r'["\']([^"\']*)["\']|[\u201c\u201d]([^\u201c\u201d]*)[\u201c\u201d]'
+        )
         
-        # Self-reference patterns
-        self.self_ref_patterns = [
-            re.compile(r'\b(i am|i\'m|myself|my own)\b', re.IGNORECASE),
-            re.compile(r'\b(मैं|मेरा|खुद)\b', re.IGNORECASE),  # Hindi self-reference
-        ]
+        # Self-reference patterns (English and Hindi)
+        self.self_ref_re = re.compile(
+            r'\b(i am|i\'m|myself|my own|मैं|मेरा|खुद)\b',
+            re.IGNORECASE
+        )
+        
+        # All groups in one scan; lookaheads stop one marker consuming another
+        self.markers_re = re.compile(
+            '|'.join(
+                f'(?=(?P<{name}>{pattern.pattern}))'
+                for name, pattern in (
+                    ('negation', self.negation_re),
+                    ('quote', self.quote_re),
+                    ('self_ref', self.self_ref_re),
+                )
+            ),
+            re.IGNORECASE
+        )
     
     def analyze(self, text: str, ml_result: Dict, lexicon_result: Dict) -> Dict:
         """Analyze context and adjust results"""
@@ -368,16 +855,18 @@ class ContextAnalyzer:
         adjusted_severity = base_severity
         context_labels = []
         
+        markers = self._find_markers(text)
+        
         # Check for negation
-        if self._has_negation(text):
+        if 'negation' in markers:
             adjusted_severity *= 0.3  # Reduce severity for negated statements
             
         # Check for quotes (reporting speech)
-        if self._has_quotes(text):
+        if 'quote' in markers:
             adjusted_severity *= 0.5  # Reduce severity for quoted content
             
         # Check for self-reference
-        if self._has_self_reference(text):
+        if 'self_ref' in markers:
             adjusted_severity *= 0.7  # Slightly reduce for self-directed content
         
         # Check for question format
@@ -390,38 +879,36 @@ class ContextAnalyzer:
             "labels": context_labels
         }
     
-    def _has_negation(self, text: str) -> bool:
-        """Check if text contains negation"""
-        return any(pattern.search(text) for pattern in self.negation_patterns)
-    
-    def _has_quotes(self, text: str) -> bool:
-        """Check if text contains quoted content"""
-        return any(pattern.search(text) for pattern in self.quote_patterns)
-    
-    def _has_self_reference(self, text: str) -> bool:
-        """Check if text contains self-reference"""
-        return any(pattern.search(text) for pattern in self.self_ref_patterns)
+    def _find_markers(self, text: str) -> set:
+        """Return which context markers (negation, quote, self_ref) occur in text"""
+        markers = set()
+        for match in self.markers_re.finditer(text):
+            markers.add(match.lastgroup)
+            if len(markers) == 3:
+                break
+        return markers
 
 
 class TextNormalizer:
     """Normalizes text for consistent processing"""
     
     def __init__(self):
-        # Common text substitutions
-        self.substitutions = [
-            (re.compile(r'[0-9]+'), ' NUM '),  # Replace numbers
-            (re.compile(r'https?://\S+'), ' URL '),  # Replace URLs
-            (re.compile(r'@\w+'), ' MENTION '),  # Replace mentions
-            (re.compile(r'#\w+'), ' HASHTAG '),  # Replace hashtags
-            (re.compile(r'\s+'), ' '),  # Normalize whitespace
-        ]
+        # Token substitutions fused into one pass; the group name is the replacement token
+        self.token_re = re.compile(
+            r'(?P<URL>https?://\S+)'
+            r'|(?P<MENTION>@\w+)'
+            r'|(?P<HASHTAG>#\w+)'
+            r'|(?P<NUM>[0-9]+)'
+        )
+        self.whitespace_re = re.compile(r'\s+')
     
     def normalize(self, text: str) -> str:
         """Normalize input text"""
-        normalized = text.strip()
-        
-        # Apply substitutions
-        for pattern, replacement in self.substitutions:
-            normalized = pattern.sub(replacement, normalized)
+        normalized = self.token_re.sub(_token_replacement, text.strip())
+        normalized = self.whitespace_re.sub(' ', normalized)
         
-        return normalized.strip()
\ No newline at end of file
+        return normalized.strip()
+
+
+def _token_replacement(match: re.Match) -> str:
+    return f" {match.lastgroup} "
@@ -2,42 +2,159 @@
 Language detection for multilingual text
 """
 
+import asyncio
 import re
-from typing import List, Dict
-from langdetect import detect_langs, LangDetectException
+import string
+from typing import List, Dict, Optional, Tuple
+import numpy as np
 import structlog
 
+from .cache import LRUCache
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+try:
+    from lingua import Language, LanguageDetectorBuilder
+except ImportError:
+    LanguageDetectorBuilder = None
+
 logger = structlog.get_logger()
 
+_ASCII_LETTERS = frozenset(string.ascii_letters)
+_ASCII_WORD_CHARS = frozenset(string.ascii_letters + string.digits + '_')
+
+# Longer texts are rarely repeated verbatim and would bloat the cache
+_CACHE_MAX_TEXT_LENGTH = 512
+
+# Statistical detection settles well before this many characters
+_STATISTICAL_MAX_TEXT_LENGTH = 300
+
+# Unicode blocks of Indian scripts, in reporting order
+_SCRIPT_RANGES = {
+    'hi': (0x0900, 0x097F),  # Devanagari
+    'bn': (0x0980, 0x09FF),  # Bengali
+    'ta': (0x0B80, 0x0BFF),  # Tamil
+    'te': (0x0C00, 0x0C7F),  # Telugu
+    'kn': (0x0C80, 0x0CFF),  # Kannada
+    'ml': (0x0D00, 0x0D7F),  # Malayalam
+    'gu': (0x0A80, 0x0AFF),  # Gujarati
+    'pa': (0x0A00, 0x0A7F),  # Gurmukhi (Punjabi)
+    'or': (0x0B00, 0x0B7F),  # Odia
+    'ur': (0x0600, 0x06FF),  # Arabic script (Urdu)
+}
+
+# Sorted [start, end + 1) boundaries: a codepoint falls inside a
+# script block exactly when its searchsorted index is odd
+_ORDERED_RANGES = sorted(_SCRIPT_RANGES.items(), key=lambda item: item[1])
+_SCRIPT_BOUNDS = np.array(
+    [bound for _, (start, end) in _ORDERED_RANGES for bound in (start, end + 1)],
+    dtype=np.uint32,
+)
+_SCRIPT_CODES = [lang_code for lang_code, _ in _ORDERED_RANGES]
+_SCRIPT_RANK = {lang_code: i for i, lang_code in enumerate(_SCRIPT_RANGES)}
+
+# Every script range is aligned to 128 codepoints, so short texts can map
+# each distinct character's block (codepoint >> 7) straight to a language
+_SCRIPT_BLOCKS = {
+    block: lang_code
+    for lang_code, (start, end) in _SCRIPT_RANGES.items()
+    for block in range(start >> 7, (end >> 7) + 1)
+}
+
+# Below roughly this length the per-character block lookup beats the fixed
+# cost of the numpy scan; above it numpy wins
+_SCRIPT_SCAN_NUMPY_MIN_LENGTH = 448
+
+# Common romanized keywords, in reporting order
+_ROMANIZED_KEYWORDS = {
+    'hi': ('hai', 'hain', 'kya', 'aur', 'main', 'tum', 'yeh', 'woh', 'kaise', 'kahan'),
+    'ur': ('aap', 'hum', 'yeh', 'woh', 'kaise', 'kahan', 'kyun', 'jab'),
+}
+
+
+def _build_romanized_lemmas() -> Dict[str, Tuple[str, ...]]:
+    """Map each keyword to every language using it (yeh, woh, ... are shared)"""
+    lemmas: Dict[str, Tuple[str, ...]] = {}
+    for lang_code, words in _ROMANIZED_KEYWORDS.items():
+        for word in words:
+            lemmas[word] = lemmas.get(word, ()) + (lang_code,)
+    return lemmas
+
+
+_ROMANIZED_LEMMAS = _build_romanized_lemmas()
+
+# Fallback when pyahocorasick is missing: one alternation over all keywords,
+# pure ASCII so the engine stays on its byte-width path
+_ROMANIZED_RE = re.compile(
+    r'\b(' + '|'.join(_ROMANIZED_LEMMAS) + r')\b', re.IGNORECASE | re.ASCII
+)
+
+
+def _build_romanized_automaton():
+    """One automaton over every keyword, mapping each to all languages using it"""
+    automaton = ahocorasick.Automaton()
+    for word, langs in _ROMANIZED_LEMMAS.items():
+        automaton.add_word(word, (len(word), langs))
+    automaton.make_automaton()
+    return automaton
+
+
+_ROMANIZED_AUTOMATON = _build_romanized_automaton() if ahocorasick else None
+
+
+def _build_lingua_detector(languages: Optional[List[str]]):
+    """Build a lingua detector for the given ISO 639-1 codes with models preloaded"""
+    if languages:
+        by_code = {language.iso_code_639_1.name.lower(): language for language in Language.all()}
+        selected = [by_code[code] for code in dict.fromkeys(languages) if code in by_code]
+        builder = LanguageDetectorBuilder.from_languages(*selected)
+    else:
+        builder = LanguageDetectorBuilder.from_all_languages()
+    return builder.with_preloaded_language_models().build()
+
+
 class LanguageDetector:
     """Detects languages in multilingual text"""
     
-    def __init__(self):
-        # Script patterns for Indian languages
-        self.script_patterns = {
-            'hi': re.compile(r'[\u0900-\u097F]+'),  # Devanagari
-            'bn': re.compile(r'[\u0980-\u09FF]+'),  # Bengali
-            'ta': re.compile(r'[\u0B80-\u0BFF]+'),  # Tamil
-            'te': re.compile(r'[\u0C00-\u0C7F]+'),  # Telugu
-            'kn': re.compile(r'[\u0C80-\u0CFF]+'),  # Kannada
-            'ml': re.compile(r'[\u0D00-\u0D7F]+'),  # Malayalam
-            'gu': re.compile(r'[\u0A80-\u0AFF]+'),  # Gujarati
-            'pa': re.compile(r'[\u0A00-\u0A7F]+'),  # Gurmukhi (Punjabi)
-            'or': re.compile(r'[\u0B00-\u0B7F]+'),  # Odia
-            'ur': re.compile(r'[\u0600-\u06FF]+'),  # Arabic script (Urdu)
-        }
-        
-        # Common romanized patterns
-        self.romanized_patterns = {
-            'hi': re.compile(r'\b(hai|hain|kya|aur|main|tum|yeh|woh|kaise|kahan)\b', re.IGNORECASE),
-            'ur': re.compile(r'\b(aap|hum|yeh|woh|kaise|kahan|kyun|jab)\b', re.IGNORECASE),
-        }
+    def __init__(self, cache_size: int = 4096, languages: Optional[List[str]] = None):
+        self.cache = LRUCache(cache_size)
+        self.languages = languages
+        self.script_ranges = _SCRIPT_RANGES
+        self.script_bounds = _SCRIPT_BOUNDS
+        self.script_codes = _SCRIPT_CODES
+        self.script_rank = _SCRIPT_RANK
+        self.script_blocks = _SCRIPT_BLOCKS
+        self.romanized_keywords = _ROMANIZED_KEYWORDS
+        self.romanized_lemmas = _ROMANIZED_LEMMAS
+        self.romanized_re = _ROMANIZED_RE
+        self.romanized_automaton = _ROMANIZED_AUTOMATON
+        self.lingua = None
     
     async def initialize(self):
         """Initialize language detector"""
-        logger.info("Language detector initialized")
+        # Model loading blocks for a while, so keep it off the event loop
+        await asyncio.to_thread(self._warm_up)
+        logger.info("Language detector initialized", statistical=self.lingua is not None)
+    
+    def _warm_up(self):
+        """Build the lingua detector with its models loaded up front"""
+        if LanguageDetectorBuilder is None:
+            logger.warning("lingua not installed, using script and keyword detection only")
+            return
+        
+        try:
+            lingua = _build_lingua_detector(self.languages)
+        except ValueError as e:
+            logger.warning("Could not build lingua detector", error=str(e))
+            return
+        
+        lingua.compute_language_confidence_values("warmup")
+        self.lingua = lingua
     
-    async def detect(self, text: str) -> List[str]:
+    async def detect(self, text: str) -> Tuple[str, ...]:
         """
         Detect languages in text
         
@@ -45,35 +162,140 @@ class LanguageDetector:
             text: Input text
             
         Returns:
-            List of detected language codes
+            Tuple of detected language codes
+        """
+        return self._detect_sync(text)
+    
+    async def detect_batch(self, texts: List[str]) -> List[Tuple[str, ...]]:
         """
-        detected_langs = []
+        Detect languages for several texts, scoring cache misses in one lingua call
         
-        # Check for script-based detection
-        for lang_code, pattern in self.script_patterns.items():
-            if pattern.search(text):
-                detected_langs.append(lang_code)
+        Args:
+            texts: Input texts
+            
+        Returns:
+            Tuple of detected language codes for each text, in input order
+        """
+        results: List[Optional[Tuple[str, ...]]] = [None] * len(texts)
+        misses: Dict[str, List[int]] = {}
+        for i, text in enumerate(texts):
+            languages = self.cache.get(text) if len(text) <= _CACHE_MAX_TEXT_LENGTH else None
+            if languages is None:
+                misses.setdefault(text, []).append(i)
+            else:
+                results[i] = languages
         
-        # Check for romanized text
-        for lang_code, pattern in self.romanized_patterns.items():
-            if pattern.search(text) and lang_code not in detected_langs:
-                detected_langs.append(lang_code)
+        miss_texts = list(misses)
+        detected = [self._detect_known(text) for text in miss_texts]
         
-        # Use langdetect for additional detection
-        try:
-            lang_probs = detect_langs(text)
-            for lang_prob in lang_probs[:2]:  # Top 2 languages
-                if lang_prob.prob > 0.3 and lang_prob.lang not in detected_langs:
-                    detected_langs.append(lang_prob.lang)
-        except LangDetectException:
-            pass
+        # Texts left ambiguous by scripts and keywords are scored together;
+        # lingua spreads the parallel variant over native threads
+        pending = [j for j, detected_langs in enumerate(detected) if len(detected_langs) < 2]
+        if pending and self.lingua is not None:
+            confidence_lists = await asyncio.to_thread(
+                self.lingua.compute_language_confidence_values_in_parallel,
+                [miss_texts[j][:_STATISTICAL_MAX_TEXT_LENGTH] for j in pending]
+            )
+            for j, confidence_values in zip(pending, confidence_lists):
+                self._add_confident(detected[j], confidence_values)
+        
+        for text, detected_langs in zip(miss_texts, detected):
+            languages = self._finalize(text, detected_langs)
+            if len(text) <= _CACHE_MAX_TEXT_LENGTH:
+                self.cache.put(text, languages)
+            for i in misses[text]:
+                results[i] = languages
+        return results
+    
+    def _detect_sync(self, text: str) -> Tuple[str, ...]:
+        """Detect languages, reusing results for short texts seen recently"""
+        if len(text) > _CACHE_MAX_TEXT_LENGTH:
+            return self._detect_uncached(text)
+        
+        languages = self.cache.get(text)
+        if languages is None:
+            languages = self._detect_uncached(text)
+            self.cache.put(text, languages)
+        return languages
+    
+    def _detect_uncached(self, text: str) -> Tuple[str, ...]:
+        """Run script, romanized and statistical detection on text"""
+        detected_langs = self._detect_known(text)
         
+        # Use lingua for additional detection unless scripts and keywords
+        # already found several languages
+        if len(detected_langs) < 2 and self.lingua is not None:
+            self._add_confident(
+                detected_langs,
+                self.lingua.compute_language_confidence_values(text[:_STATISTICAL_MAX_TEXT_LENGTH])
+            )
+        
+        return self._finalize(text, detected_langs)
+    
+    def _detect_known(self, text: str) -> Dict[str, None]:
+        """Languages given away by script or romanized keywords, as an ordered set"""
+        # Dict as an ordered set: O(1) dedup while keeping script matches
+        # ahead of romanized and statistical guesses for the top-3 cut
+        detected_langs = dict.fromkeys(self._detect_scripts(text))
+        
+        # Check for romanized text
+        detected_langs.update(dict.fromkeys(self._detect_romanized(text)))
+        return detected_langs
+    
+    def _add_confident(self, detected_langs: Dict[str, None], confidence_values) -> None:
+        """Add the top two lingua languages above 0.3 confidence"""
+        for confidence in confidence_values[:2]:  # Top 2 languages
+            if confidence.value > 0.3:
+                detected_langs.setdefault(confidence.language.iso_code_639_1.name.lower())
+    
+    def _finalize(self, text: str, detected_langs: Dict[str, None]) -> Tuple[str, ...]:
+        """Apply the English defaults and keep the top three languages"""
         # Default to English if no languages detected
         if not detected_langs:
-            detected_langs = ['en']
+            detected_langs['en'] = None
         
         # Ensure English is included if Latin script is present
-        if re.search(r'[a-zA-Z]+', text) and 'en' not in detected_langs:
-            detected_langs.append('en')
+        if not _ASCII_LETTERS.isdisjoint(text):
+            detected_langs.setdefault('en')
         
-        return detected_langs[:3]  # Limit to top 3 languages
\ No newline at end of file
+        return tuple(detected_langs)[:3]  # Limit to top 3 languages
+    
+    def _detect_scripts(self, text: str) -> List[str]:
+        """Find Indian scripts present in text with a single codepoint scan"""
+        if text.isascii():
+            return []
+        
+        if len(text) < _SCRIPT_SCAN_NUMPY_MIN_LENGTH:
+            found = {self.script_blocks.get(ord(ch) >> 7) for ch in set(text)}
+            found.discard(None)
+            return sorted(found, key=self.script_rank.__getitem__)
+        
+        codepoints = np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32)
+        slots = np.searchsorted(self.script_bounds, codepoints, side='right')
+        found = [self.script_codes[slot // 2] for slot in np.unique(slots[slots & 1 == 1])]
+        return sorted(found, key=self.script_rank.__getitem__)
+    
+    def _detect_romanized(self, text: str) -> List[str]:
+        """Find romanized languages whose keywords appear as whole words"""
+        found = set()
+        if self.romanized_automaton is None:
+            for match in self.romanized_re.finditer(text):
+                found.update(self.romanized_lemmas[match.group(1).lower()])
+                if len(found) == len(self.romanized_keywords):
+                    break
+            return [lang_code for lang_code in self.romanized_keywords if lang_code in found]
+        
+        text_lower = text.lower()
+        text_len = len(text_lower)
+        for end, (length, langs) in self.romanized_automaton.iter(text_lower):
+            start = end - length + 1
+            if start > 0 and text_lower[start - 1] in _ASCII_WORD_CHARS:
+                continue
+            if end + 1 < text_len and text_lower[end + 1] in _ASCII_WORD_CHARS:
+                continue
+            found.update(langs)
+            if len(found) == len(self.romanized_keywords):
+                break
+        
+        return [lang_code for lang_code in self.romanized_keywords if lang_code in found]
+
@@ -1,97 +1,225 @@
 """
 Middleware for rate limiting, metrics, and monitoring
+
+Both middlewares are plain ASGI callables rather than BaseHTTPMiddleware
+subclasses, which avoids the extra task group and stream per request.
 """
 
+import asyncio
+import contextlib
+import itertools
 import time
-from typing import Dict, Optional
-from collections import defaultdict, deque
-from fastapi import Request, Response, HTTPException
-from starlette.middleware.base import BaseHTTPMiddleware
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 import structlog
 
 logger = structlog.get_logger()
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
+# Probe, static and documentation paths that are never rate limited
+SKIP_PATHS = frozenset({
+    "/health", "/ready", "/metrics", "/languages", "/docs", "/openapi.json"
+})
+
+class RateLimitMiddleware:
     """Rate limiting middleware using sliding window"""
     
-    def __init__(self, app, requests_per_minute: int = 100):
-        super().__init__(app)
+    window_seconds = 60
+    reap_interval = 30
+    
+    def __init__(self, app: ASGIApp, requests_per_minute: int = 100):
+        self.app = app
         self.requests_per_minute = requests_per_minute
-        self.clients: Dict[str, deque] = defaultdict(deque)
+        # Per client: ring of the last accepted request times in whole
+        # monotonic seconds (0 marks an empty slot), plus the next write position
+        self.clients: Dict[str, Tuple[np.ndarray, List[int]]] = {}
+        self._reaper_task: Optional[asyncio.Task] = None
+        # Set once the server runs the lifespan protocol, which then owns the reaper
+        self._lifespan = False
     
-    async def dispatch(self, request: Request, call_next):
-        # Skip rate limiting for health checks
-        if request.url.path == "/health":
-            return await call_next(request)
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] == "lifespan":
+            await self.app(scope, self._manage_reaper(receive), send)
+            return
+        
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
         
-        client_ip = self._get_client_ip(request)
-        current_time = time.time()
+        # Fallback for servers without lifespan support
+        if not self._lifespan:
+            self._ensure_reaper()
         
-        # Clean old requests
-        client_requests = self.clients[client_ip]
-        while client_requests and current_time - client_requests[0] > 60:
-            client_requests.popleft()
+        # Skip rate limiting for health checks and other probes
+        if scope["path"] in SKIP_PATHS:
+            await self.app(scope, receive, send)
+            return
         
-        # Check rate limit
-        if len(client_requests) >= self.requests_per_minute:
+        client_ip = self._get_client_ip(scope)
+        # Monotonic time is immune to wall-clock jumps; +1 keeps 0 free for empty slots
+        current_time = int(time.monotonic()) + 1
+        cutoff = max(current_time - self.window_seconds, 1)
+        
+        client = self.clients.get(client_ip)
+        if client is None:
+            client = (np.zeros(self.requests_per_minute, dtype=np.uint32), [0])
+            self.clients[client_ip] = client
+        timestamps, head = client
+        
+        # Check rate limit; stale slots simply fall outside the window
+        recent = np.count_nonzero(timestamps >= cutoff)
+        if recent >= self.requests_per_minute:
             logger.warning("Rate limit exceeded", client_ip=client_ip)
-            raise HTTPException(
-                status_code=429,
-                detail="Rate limit exceeded. Try again later."
+            response = JSONResponse(
+                {"detail": "Rate limit exceeded. Try again later."},
+                status_code=429
             )
+            await response(scope, receive, send)
+            return
         
-        # Add current request
-        client_requests.append(current_time)
+        # Add current request, overwriting the oldest slot
+        timestamps[head[0]] = current_time
+        head[0] = (head[0] + 1) % self.requests_per_minute
+        
+        await self.app(scope, receive, send)
+    
+    def _ensure_reaper(self):
+        """Start the reaper on the serving loop, restarting it if that loop changed"""
+        # Started from the serving loop rather than in __init__
+        task = self._reaper_task
+        if task is None or task.done() or task.get_loop() is not asyncio.get_running_loop():
+            self._reaper_task = asyncio.create_task(self._reap_idle_clients())
+    
+    def _manage_reaper(self, receive: Receive) -> Receive:
+        """Wrap the lifespan receive channel to start the reaper on startup and stop it on shutdown"""
+        async def receive_with_reaper() -> Message:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                self._lifespan = True
+                self._ensure_reaper()
+            elif message["type"] == "lifespan.shutdown":
+                await self.stop()
+            return message
+        return receive_with_reaper
+    
+    async def stop(self):
+        """Cancel the reaper task"""
+        task, self._reaper_task = self._reaper_task, None
+        if task is None or task.done():
+            return
         
-        response = await call_next(request)
-        return response
+        task.cancel()
+        if task.get_loop() is asyncio.get_running_loop():
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
     
-    def _get_client_ip(self, request: Request) -> str:
-        """Extract client IP from request"""
-        forwarded = request.headers.get("X-Forwarded-For")
+    async def _reap_idle_clients(self):
+        """Periodically drop clients with no requests left in the window"""
+        while True:
+            await asyncio.sleep(self.reap_interval)
+            cutoff = int(time.monotonic()) + 1 - self.window_seconds
+            idle = [
+                client_ip for client_ip, (timestamps, _) in self.clients.items()
+                if timestamps.max(initial=0) < cutoff
+            ]
+            for client_ip in idle:
+                del self.clients[client_ip]
+            if idle:
+                logger.debug("Reaped idle rate-limit clients", count=len(idle))
+    
+    def _get_client_ip(self, scope: Scope) -> str:
+        """Extract client IP from the request scope, caching it on request.state"""
+        state = scope.setdefault("state", {})
+        client_ip = state.get("client_ip")
+        if client_ip is not None:
+            return client_ip
+        
+        forwarded = Headers(scope=scope).get("x-forwarded-for")
         if forwarded:
-            return forwarded.split(",")[0].strip()
-        return request.client.host if request.client else "unknown"
+            # Only the first (originating) address is needed
+            comma = forwarded.find(",")
+            client_ip = (forwarded[:comma] if comma != -1 else forwarded).strip()
+        else:
+            client = scope.get("client")
+            client_ip = client[0] if client else "unknown"
+        
+        state["client_ip"] = client_ip
+        return client_ip
 
 
-class MetricsMiddleware(BaseHTTPMiddleware):
-    """Metrics collection middleware"""
+class RequestMetrics:
+    """Per-worker request counters, shared by MetricsMiddleware and the /metrics endpoint"""
     
-    def __init__(self, app):
-        super().__init__(app)
+    def __init__(self):
+        # next() on itertools.count is a single C call, unlike a += read-modify-write
+        self._requests = itertools.count(1)
+        self._errors = itertools.count(1)
         self.request_count = 0
         self.request_duration_sum = 0.0
         self.error_count = 0
     
-    async def dispatch(self, request: Request, call_next):
-        start_time = time.time()
-        
-        try:
-            response = await call_next(request)
-            
-            # Record metrics
-            duration = time.time() - start_time
-            self.request_count += 1
-            self.request_duration_sum += duration
-            
-            if response.status_code >= 400:
-                self.error_count += 1
-            
-            # Add metrics headers
-            response.headers["X-Request-Duration"] = str(duration)
-            response.headers["X-Request-Count"] = str(self.request_count)
-            
-            logger.info(
-                "Request processed",
-                method=request.method,
-                path=request.url.path,
-                status_code=response.status_code,
-                duration=duration
+    def record_request(self, duration: float):
+        self.request_count = next(self._requests)
+        self.request_duration_sum += duration
+    
+    def record_error(self):
+        self.error_count = next(self._errors)
+    
+    def snapshot(self) -> Dict[str, float]:
+        """Current counter values"""
+        return {
+            "request_count": self.request_count,
+            "error_count": self.error_count,
+            "request_duration_sum": self.request_duration_sum,
+            "request_duration_avg": (
+                self.request_duration_sum / self.request_count if self.request_count else 0.0
             )
+        }
+
+
+class MetricsMiddleware:
+    """Metrics collection middleware"""
+    
+    def __init__(self, app: ASGIApp, metrics: Optional[RequestMetrics] = None):
+        self.app = app
+        self.metrics = metrics if metrics is not None else RequestMetrics()
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        start_time = time.perf_counter_ns()
+        
+        async def send_with_metrics(message: Message):
+            if message["type"] == "http.response.start":
+                # Record metrics
+                duration = (time.perf_counter_ns() - start_time) / 1e9
+                status_code = message["status"]
+                self.metrics.record_request(duration)
+                
+                if status_code >= 400:
+                    self.metrics.record_error()
+                
+                # Add metrics headers; counters are served by /metrics instead
+                headers = MutableHeaders(scope=message)
+                headers["X-Request-Duration"] = str(duration)
+                
+                logger.info(
+                    "Request processed",
+                    method=scope["method"],
+                    path=scope["path"],
+                    status_code=status_code,
+                    duration=duration
+                )
             
-            return response
-            
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_with_metrics)
         except Exception as e:
-            self.error_count += 1
+            self.metrics.record_error()
             logger.error("Request failed", error=str(e))
-            raise
\ No newline at end of file
+            raise
@@ -2,8 +2,8 @@
 Pydantic models for API requests and responses
 """
 
-from typing import List, Optional, Dict, Any
-from pydantic import BaseModel, Field
+from typing import List, Optional, Dict, Any, Tuple
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
 from enum import Enum
 
 class DecisionType(str, Enum):
@@ -22,6 +22,8 @@ class LabelType(str, Enum):
 
 class Highlight(BaseModel):
     """Represents a highlighted span in the text"""
+    model_config = ConfigDict(frozen=True, extra='forbid')
+    
     start: int = Field(..., description="Start position of the span")
     end: int = Field(..., description="End position of the span")
     severity: float = Field(..., ge=0, le=1, description="Severity score for this span")
@@ -48,14 +50,12 @@ class DetectionResponse(BaseModel):
     """Response model for abuse detection"""
     severity_score: float = Field(..., ge=0, le=1, description="Overall severity score")
     decision: DecisionType = Field(..., description="Recommended action")
-    detected_languages: List[str] = Field(..., description="Detected language codes")
-    labels: List[LabelType] = Field(..., description="Types of abuse detected")
+    detected_languages: Tuple[str, ...] = Field(..., description="Detected language codes")
+    labels: Tuple[LabelType, ...] = Field(..., description="Types of abuse detected")
     highlights: List[Highlight] = Field(default_factory=list, description="Highlighted problematic spans")
     confidence: float = Field(..., ge=0, le=1, description="Confidence in the detection")
     processing_time_ms: Optional[float] = Field(None, description="Processing time in milliseconds")
-    
-    class Config:
-        json_encoders = {
-            DecisionType: lambda v: v.value,
-            LabelType: lambda v: v.value
-        }
\ No newline at end of file
+
+# Whole-batch (de)serialization through a single compiled validator/serializer
+BatchRequestAdapter = TypeAdapter(List[DetectionRequest])
+BatchResponseAdapter = TypeAdapter(List[DetectionResponse])